@@ -2,6 +2,12 @@ import pandas as pd
 import numpy as np
 from sklearn.linear_model import LinearRegression
 
+PAYMENT_TYPE_WEIGHTS = {
+    'Full Payment': 1.0,
+    'Minimum Due': 0.5,
+    'Partial Payment': 0.2
+}
+
 def calculate_repayment_score(df):
     """
     Calculates Repayment Score (0-100)
@@ -10,12 +16,7 @@ def calculate_repayment_score(df):
     """
     on_time_ratio = df['paid_on_time'].mean() * 100
     
-    type_weights = {
-        'Full Payment': 1.0,
-        'Minimum Due': 0.5,
-        'Partial Payment': 0.2
-    }
-    avg_payment_weight = df['payment_type'].map(type_weights).mean() * 100
+    avg_payment_weight = df['payment_type'].map(PAYMENT_TYPE_WEIGHTS).mean() * 100
     
     # Combined Repayment Score (60% on-time, 40% payment type quality)
     score = (on_time_ratio * 0.6) + (avg_payment_weight * 0.4)
@@ -86,16 +87,11 @@ def calculate_category_weight_score(df):
     score = (essential_ratio * 100) + ((1 - luxury_ratio) * 100)
     return min(100, max(0, score / 2))
 
-def get_comprehensive_score(df, current_limit):
+def combine_scores(repayment, utilization, stability, growth, lifestyle):
     """
-    Combines all scores into a final Credit Score (0-100).
+    Combines the individual behavioral metrics into the score dict.
+    Shared by the exact scorer and the streaming sketch scorer.
     """
-    repayment = calculate_repayment_score(df)
-    utilization = calculate_utilization_ratio(df, current_limit)
-    stability = calculate_stability_score(df)
-    growth = calculate_growth_trend(df)
-    lifestyle = calculate_category_weight_score(df)
-    
     # Utilization score (Inverse: 100 is best, which means < 30% usage)
     if utilization <= 30:
         util_score = 100
@@ -121,3 +117,15 @@ def get_comprehensive_score(df, current_limit):
         'growth_trend': round(growth, 2),
         'lifestyle_score': round(lifestyle, 2)
     }
+
+def get_comprehensive_score(df, current_limit):
+    """
+    Combines all scores into a final Credit Score (0-100).
+    """
+    repayment = calculate_repayment_score(df)
+    utilization = calculate_utilization_ratio(df, current_limit)
+    stability = calculate_stability_score(df)
+    growth = calculate_growth_trend(df)
+    lifestyle = calculate_category_weight_score(df)
+    
+    return combine_scores(repayment, utilization, stability, growth, lifestyle)
@@ -7,7 +7,9 @@ from data_generator import generate_synthetic_data
 from analysis import get_comprehensive_score
 from decision_engine import generate_credit_decision
 from mailer import send_decision_email
-from utils import create_pdf_report
+from utils import create_pdf_report, derived
+from data_store import get_shared_store
+from decision_ledger import get_ledger
 
 # Page Configuration
 st.set_page_config(
@@ -16,17 +18,24 @@ st.set_page_config(
     layout="wide"
 )
 
+# Process-wide store shared by all sessions; sessions only keep the content key
+data_store = get_shared_store()
+
 # Initialize Session State
 if 'logged_in' not in st.session_state:
     st.session_state['logged_in'] = False
-if 'data' not in st.session_state:
-    st.session_state['data'] = None
+if 'data_key' not in st.session_state:
+    st.session_state['data_key'] = None
 if 'analysis' not in st.session_state:
     st.session_state['analysis'] = None
 if 'decision' not in st.session_state:
     st.session_state['decision'] = None
 if 'current_limit' not in st.session_state:
     st.session_state['current_limit'] = 50000
+if 'derived' not in st.session_state:
+    st.session_state['derived'] = {}
+if 'upload' not in st.session_state:
+    st.session_state['upload'] = None
 
 # Custom CSS with Animations and Transitions
 st.markdown("""
@@ -148,6 +157,311 @@ st.markdown("""
 # Callback Handling
 handle_callback()
 
+# --- FRAGMENTS ---
+# Each tab is a keyed fragment, so interacting with a widget inside one only
+# reruns that fragment. Widgets whose change affects other tabs (new data,
+# a new limit) rerun just the fragments that depend on it from their
+# callback, instead of the whole page. Expensive results are cached in
+# st.session_state['derived'] keyed by what they depend on (data_key,
+# current_limit), so each fragment only recomputes what actually changed.
+
+def build_spending_charts(df):
+    df_monthly = df.groupby(df['date'].dt.to_period('M'))['amount'].sum().reset_index()
+    df_monthly['date'] = df_monthly['date'].astype(str)
+    fig_line = px.line(df_monthly, x='date', y='amount', title="Monthly Spending Trend")
+    fig_pie = px.pie(df, values='amount', names='category', hole=0.4)
+    return fig_line, fig_pie
+
+def build_health_gauges(analysis):
+    fig_g1 = go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = analysis['repayment_score'],
+        title = {'text': "Repayment Score"},
+        gauge = {'axis': {'range': [0, 100]}, 'bar': {'color': "darkblue"}}
+    ))
+    
+    util = analysis['utilization_ratio']
+    color = "green" if util < 30 else "orange" if util < 70 else "red"
+    fig_g2 = go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = util,
+        title = {'text': "Utilization (%)"},
+        gauge = {'axis': {'range': [0, 100]}, 'bar': {'color': color}}
+    ))
+    
+    fig_g3 = go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = analysis['stability_score'],
+        title = {'text': "Stability Score"},
+        gauge = {'axis': {'range': [0, 100]}, 'bar': {'color': "darkblue"}}
+    ))
+    return fig_g1, fig_g2, fig_g3
+
+def build_score_gauge(score):
+    return go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = score,
+        gauge = {
+            'axis': {'range': [0, 100]},
+            'steps': [
+                {'range': [0, 40], 'color': "red"},
+                {'range': [40, 65], 'color': "yellow"},
+                {'range': [65, 90], 'color': "lightgreen"},
+                {'range': [90, 100], 'color': "green"}
+            ]
+        }
+    ))
+
+def read_uploaded_csv(uploaded_file):
+    """Returns (data_key, error)."""
+    try:
+        uploaded_file.seek(0)
+        df = pd.read_csv(uploaded_file)
+        df['date'] = pd.to_datetime(df['date'])
+        # Validation: ensure current_limit is NOT in the CSV (as per refactor requirement)
+        if 'current_limit' in df.columns:
+            df = df.drop(columns=['current_limit'])
+        return data_store.put(df), None
+    except Exception as e:
+        return None, e
+
+def rerun_data_views():
+    """Reruns the fragments that show the session's data after it changed."""
+    st.rerun(['data_input', 'analytics', 'decision', 'store_usage'])
+
+def set_limit():
+    st.session_state['current_limit'] = st.session_state['limit_input']
+    # Only the analytics and decision tabs depend on the limit
+    st.rerun(['analytics', 'decision'])
+
+def limit_input():
+    st.number_input(
+        "Enter Current Credit Card Limit (₹)",
+        min_value=10000,
+        max_value=1000000,
+        value=st.session_state['current_limit'],
+        step=5000,
+        key='limit_input',
+        on_change=set_limit
+    )
+
+def apply_upload():
+    uploaded_file = st.session_state['uploaded_file']
+    if uploaded_file is None:
+        return
+    data_key, error = read_uploaded_csv(uploaded_file)
+    st.session_state['upload'] = (uploaded_file.file_id, data_key, error)
+    if error is None:
+        st.session_state['data_key'] = data_key
+        rerun_data_views()
+
+def generate_data():
+    st.session_state['data_key'] = data_store.put(generate_synthetic_data(150))
+    st.session_state['data_message'] = "Synthetic data generated!"
+    rerun_data_views()
+
+@st.fragment(key='data_input')
+def data_input_tab():
+    state = st.session_state['derived']
+    
+    st.header("Transaction Data Upload")
+    uploaded_file = st.file_uploader("Upload Transaction CSV (date, amount, category, payment_type, paid_on_time)",
+                                     type="csv", key='uploaded_file', on_change=apply_upload)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        upload = st.session_state['upload']
+        if uploaded_file is not None and upload is not None and upload[0] == uploaded_file.file_id:
+            _, data_key, error = upload
+            if error is None and data_key not in data_store:
+                # The frame was dropped from the store under memory/disk pressure;
+                # the content key is unchanged, so sessions using it see it again
+                data_key, error = read_uploaded_csv(uploaded_file)
+                st.session_state['upload'] = (uploaded_file.file_id, data_key, error)
+            if error is not None:
+                st.error(f"Error reading file: {error}")
+            elif st.session_state['data_key'] == data_key:
+                st.success("File uploaded successfully!")
+    
+    with col2:
+        st.write("Don't have data? Use our generator:")
+        st.button("Generate Synthetic Demo Data", on_click=generate_data)
+
+    if 'data_message' in st.session_state:
+        st.success(st.session_state.pop('data_message'))
+
+    data_key = st.session_state['data_key']
+    df = data_store.get(data_key)
+    if df is None and data_key is not None:
+        st.warning("This data is no longer available. Please upload or generate it again.")
+    if df is not None:
+        st.divider()
+        st.subheader("Data Preview")
+        st.dataframe(df.head(10), use_container_width=True)
+        
+        # Summary Stats
+        total_spend, avg_spend = derived(state, 'summary', (data_key,),
+                                         lambda: (df['amount'].sum(), df['amount'].mean()))
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Total Transactions", len(df))
+        m2.metric("Total Spend", f"₹{total_spend:,.2f}")
+        m3.metric("Avg Transaction", f"₹{avg_spend:,.2f}")
+
+def current_analysis():
+    """
+    Returns (df, analysis) for the session's data and limit, or (None, None)
+    without data. Shared by the analytics and decision fragments, which may
+    rerun without each other.
+    """
+    data_key = st.session_state['data_key']
+    df = data_store.get(data_key)
+    if df is None:
+        return None, None
+    current_limit = st.session_state['current_limit']
+    analysis = derived(st.session_state['derived'], 'analysis', (data_key, current_limit),
+                       lambda: get_comprehensive_score(df, current_limit))
+    st.session_state['analysis'] = analysis
+    return df, analysis
+
+@st.fragment(key='analytics')
+def analytics_tab():
+    state = st.session_state['derived']
+    data_key = st.session_state['data_key']
+    current_limit = st.session_state['current_limit']
+    with st.spinner("Analyzing behavior..."):
+        df, analysis = current_analysis()
+    if df is None:
+        st.warning("Please upload or generate data first.")
+        return
+
+    st.header("Behavioral Insights")
+    
+    # Row 1: Charts (depend on the data only)
+    fig_line, fig_pie = derived(state, 'spending_charts', (data_key,),
+                                lambda: build_spending_charts(df))
+    c1, c2 = st.columns(2)
+    with c1:
+        st.subheader("Spending Over Time")
+        st.plotly_chart(fig_line, use_container_width=True)
+    
+    with c2:
+        st.subheader("Category Distribution")
+        st.plotly_chart(fig_pie, use_container_width=True)
+
+    # Row 2: Gauges
+    st.divider()
+    st.subheader("Credit Health Metrics")
+    gauges = derived(state, 'health_gauges', (data_key, current_limit),
+                     lambda: build_health_gauges(analysis))
+    for col, fig in zip(st.columns(3), gauges):
+        with col:
+            st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment(key='decision')
+def decision_tab():
+    state = st.session_state['derived']
+    _, analysis = current_analysis()
+    if analysis is None:
+        st.warning("Please upload or generate data first.")
+        return
+    current_limit = st.session_state['current_limit']
+    
+    # Unpack decision results
+    score, rec_limit, explanation = derived(state, 'decision', (analysis['final_score'], current_limit),
+                                            lambda: generate_credit_decision(analysis['final_score'], current_limit))
+    st.session_state['decision'] = (score, rec_limit, explanation)
+    
+    st.header("Final Decision Report")
+    
+    col_res, col_score = st.columns([2, 1])
+    
+    with col_score:
+        st.metric("FINAL CREDIT SCORE", f"{score}/100")
+        fig_final = derived(state, 'score_gauge', (score,), lambda: build_score_gauge(score))
+        st.plotly_chart(fig_final, use_container_width=True)
+
+    with col_res:
+        st.subheader("System Recommendation")
+        
+        # Determine status label
+        if rec_limit > current_limit:
+            status = "LIMIT INCREASE APPROVED"
+        elif rec_limit < current_limit:
+            status = "LIMIT REDUCTION RECOMMENDED"
+        else:
+            status = "MAINTAIN CURRENT LIMIT"
+            
+        st.info(f"STATUS: {status}")
+        
+        c_lim1, c_lim2 = st.columns(2)
+        c_lim1.metric("Current Limit", f"₹{current_limit:,.2f}")
+        c_lim2.metric("New Recommended Limit", f"₹{rec_limit:,.2f}", 
+                     delta=f"{((rec_limit/current_limit)-1)*100:.1f}%")
+        
+        st.write("**Behavior Summary & Reasoning:**")
+        st.write(explanation)
+        
+        st.divider()
+        
+        # Actions
+        if st.button("🚀 Send Decision Email & Generate PDF"):
+            with st.spinner("Processing official communication..."):
+                # Ledger
+                get_ledger().record_decision(
+                    st.session_state['user_email'],
+                    analysis,
+                    st.session_state['decision'],
+                    current_limit
+                )
+                
+                # Email
+                success, msg = send_decision_email(
+                    st.session_state['user_email'],
+                    score,
+                    current_limit,
+                    rec_limit,
+                    explanation
+                )
+                if success:
+                    st.success(msg)
+                else:
+                    st.error(msg)
+                
+                # PDF Download
+                pdf_bytes = create_pdf_report(
+                    st.session_state['user_email'],
+                    current_limit,
+                    analysis,
+                    st.session_state['decision']
+                )
+                st.download_button(
+                    label="Download PDF Report",
+                    data=pdf_bytes,
+                    file_name="Credit_Decision_Report.pdf",
+                    mime="application/pdf"
+                )
+
+    # Prior decisions for this customer
+    st.divider()
+    st.subheader("Decision History")
+    ledger = get_ledger()
+    history, _ = ledger.query(customer_id=st.session_state['user_email'], page_size=20)
+    if history:
+        st.caption(f"Showing {len(history)} of {ledger.count(customer_id=st.session_state['user_email'])} recorded decisions")
+        st.dataframe(
+            pd.DataFrame(history)[['decided_at', 'decision_band', 'final_score', 'current_limit', 'recommended_limit']],
+            use_container_width=True
+        )
+    else:
+        st.write("No prior decisions recorded.")
+
+@st.fragment(key='store_usage')
+def store_usage_caption():
+    store_usage = data_store.usage()
+    st.caption(f"Shared data cache: {store_usage['bytes_in_memory'] / 1024 ** 2:.1f} MB / "
+               f"{store_usage['budget_bytes'] / 1024 ** 2:.0f} MB "
+               f"({store_usage['frames_in_memory']} in memory, {store_usage['frames_spilled']} on disk)")
+
 # --- SIDEBAR ---
 with st.sidebar:
     st.markdown("### 💳 DCLA System")
@@ -157,13 +471,8 @@ with st.sidebar:
         # Current Limit Input
         st.divider()
         st.subheader("Account Metadata")
-        st.session_state['current_limit'] = st.number_input(
-            "Enter Current Credit Card Limit (₹)",
-            min_value=10000,
-            max_value=1000000,
-            value=st.session_state['current_limit'],
-            step=5000
-        )
+        limit_input()
+        store_usage_caption()
         
         st.divider()
         if st.button("Logout"):
@@ -251,186 +560,12 @@ else:
 
     # TABS 1: DATA INPUT
     with tabs[0]:
-        st.header("Transaction Data Upload")
-        uploaded_file = st.file_uploader("Upload Transaction CSV (date, amount, category, payment_type, paid_on_time)", type="csv")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            if uploaded_file is not None:
-                try:
-                    df = pd.read_csv(uploaded_file)
-                    df['date'] = pd.to_datetime(df['date'])
-                    # Validation: ensure current_limit is NOT in the CSV (as per refactor requirement)
-                    if 'current_limit' in df.columns:
-                        df = df.drop(columns=['current_limit'])
-                    st.session_state['data'] = df
-                    st.success("File uploaded successfully!")
-                except Exception as e:
-                    st.error(f"Error reading file: {e}")
-        
-        with col2:
-            st.write("Don't have data? Use our generator:")
-            if st.button("Generate Synthetic Demo Data"):
-                with st.spinner("Simulating banking transactions..."):
-                    st.session_state['data'] = generate_synthetic_data(150)
-                    st.success("Synthetic data generated!")
-
-        if st.session_state['data'] is not None:
-            st.divider()
-            st.subheader("Data Preview")
-            st.dataframe(st.session_state['data'].head(10), use_container_width=True)
-            
-            # Summary Stats
-            df = st.session_state['data']
-            m1, m2, m3 = st.columns(3)
-            m1.metric("Total Transactions", len(df))
-            m2.metric("Total Spend", f"₹{df['amount'].sum():,.2f}")
-            m3.metric("Avg Transaction", f"₹{df['amount'].mean():,.2f}")
+        data_input_tab()
 
     # TABS 2: ANALYTICS
     with tabs[1]:
-        if st.session_state['data'] is None:
-            st.warning("Please upload or generate data first.")
-        else:
-            df = st.session_state['data']
-            current_limit = st.session_state['current_limit']
-            
-            with st.spinner("Analyzing behavior..."):
-                analysis = get_comprehensive_score(df, current_limit)
-                st.session_state['analysis'] = analysis
-
-            st.header("Behavioral Insights")
-            
-            # Row 1: Charts
-            c1, c2 = st.columns(2)
-            with c1:
-                st.subheader("Spending Over Time")
-                df_monthly = df.groupby(df['date'].dt.to_period('M'))['amount'].sum().reset_index()
-                df_monthly['date'] = df_monthly['date'].astype(str)
-                fig_line = px.line(df_monthly, x='date', y='amount', title="Monthly Spending Trend")
-                st.plotly_chart(fig_line, use_container_width=True)
-            
-            with c2:
-                st.subheader("Category Distribution")
-                fig_pie = px.pie(df, values='amount', names='category', hole=0.4)
-                st.plotly_chart(fig_pie, use_container_width=True)
-
-            # Row 2: Gauges
-            st.divider()
-            st.subheader("Credit Health Metrics")
-            g1, g2, g3 = st.columns(3)
-            
-            with g1:
-                fig_g1 = go.Figure(go.Indicator(
-                    mode = "gauge+number",
-                    value = analysis['repayment_score'],
-                    title = {'text': "Repayment Score"},
-                    gauge = {'axis': {'range': [0, 100]}, 'bar': {'color': "darkblue"}}
-                ))
-                st.plotly_chart(fig_g1, use_container_width=True)
-                
-            with g2:
-                util = analysis['utilization_ratio']
-                color = "green" if util < 30 else "orange" if util < 70 else "red"
-                fig_g2 = go.Figure(go.Indicator(
-                    mode = "gauge+number",
-                    value = util,
-                    title = {'text': "Utilization (%)"},
-                    gauge = {'axis': {'range': [0, 100]}, 'bar': {'color': color}}
-                ))
-                st.plotly_chart(fig_g2, use_container_width=True)
-
-            with g3:
-                fig_g3 = go.Figure(go.Indicator(
-                    mode = "gauge+number",
-                    value = analysis['stability_score'],
-                    title = {'text': "Stability Score"},
-                    gauge = {'axis': {'range': [0, 100]}, 'bar': {'color': "darkblue"}}
-                ))
-                st.plotly_chart(fig_g3, use_container_width=True)
+        analytics_tab()
 
     # TABS 3: DECISION
     with tabs[2]:
-        if st.session_state['analysis'] is None:
-            st.warning("Please run analysis in the previous tab.")
-        else:
-            analysis = st.session_state['analysis']
-            current_limit = st.session_state['current_limit']
-            
-            # Unpack decision results
-            score, rec_limit, explanation = generate_credit_decision(analysis['final_score'], current_limit)
-            st.session_state['decision'] = (score, rec_limit, explanation)
-            
-            st.header("Final Decision Report")
-            
-            col_res, col_score = st.columns([2, 1])
-            
-            with col_score:
-                st.metric("FINAL CREDIT SCORE", f"{score}/100")
-                fig_final = go.Figure(go.Indicator(
-                    mode = "gauge+number",
-                    value = score,
-                    gauge = {
-                        'axis': {'range': [0, 100]},
-                        'steps': [
-                            {'range': [0, 40], 'color': "red"},
-                            {'range': [40, 65], 'color': "yellow"},
-                            {'range': [65, 90], 'color': "lightgreen"},
-                            {'range': [90, 100], 'color': "green"}
-                        ]
-                    }
-                ))
-                st.plotly_chart(fig_final, use_container_width=True)
-
-            with col_res:
-                st.subheader("System Recommendation")
-                
-                # Determine status label
-                if rec_limit > current_limit:
-                    status = "LIMIT INCREASE APPROVED"
-                elif rec_limit < current_limit:
-                    status = "LIMIT REDUCTION RECOMMENDED"
-                else:
-                    status = "MAINTAIN CURRENT LIMIT"
-                    
-                st.info(f"STATUS: {status}")
-                
-                c_lim1, c_lim2 = st.columns(2)
-                c_lim1.metric("Current Limit", f"₹{current_limit:,.2f}")
-                c_lim2.metric("New Recommended Limit", f"₹{rec_limit:,.2f}", 
-                             delta=f"{((rec_limit/current_limit)-1)*100:.1f}%")
-                
-                st.write("**Behavior Summary & Reasoning:**")
-                st.write(explanation)
-                
-                st.divider()
-                
-                # Actions
-                if st.button("🚀 Send Decision Email & Generate PDF"):
-                    with st.spinner("Processing official communication..."):
-                        # Email
-                        success, msg = send_decision_email(
-                            st.session_state['user_email'],
-                            score,
-                            current_limit,
-                            rec_limit,
-                            explanation
-                        )
-                        if success:
-                            st.success(msg)
-                        else:
-                            st.error(msg)
-                        
-                        # PDF Download
-                        pdf_bytes = create_pdf_report(
-                            st.session_state['user_email'],
-                            current_limit,
-                            analysis,
-                            st.session_state['decision']
-                        )
-                        st.download_button(
-                            label="Download PDF Report",
-                            data=pdf_bytes,
-                            file_name="Credit_Decision_Report.pdf",
-                            mime="application/pdf"
-                        )
+        decision_tab()
@@ -0,0 +1,31 @@
+import pandas as pd
+from analysis import get_comprehensive_score
+from decision_engine import generate_credit_decision
+
+DEFAULT_LIMIT = 50000
+
+def get_customer_limit(current_limits, customer_id, default_limit=DEFAULT_LIMIT):
+    """current_limits may be a single number or a {customer_id: limit} dict."""
+    if isinstance(current_limits, dict):
+        return current_limits.get(customer_id, default_limit)
+    if current_limits is None:
+        return default_limit
+    return current_limits
+
+def score_customers(df, current_limits=None, default_limit=DEFAULT_LIMIT):
+    """
+    Scores every customer in a multi-customer frame (needs customer_id).
+    Runs the same analysis + decision logic as the dashboard, one customer
+    at a time. Returns one row per customer, sorted by customer_id.
+    """
+    rows = []
+    for customer_id, group in df.groupby('customer_id', sort=True):
+        current_limit = get_customer_limit(current_limits, customer_id, default_limit)
+        analysis = get_comprehensive_score(group.copy(), current_limit)
+        score, rec_limit, explanation = generate_credit_decision(analysis['final_score'], current_limit)
+        row = {'customer_id': customer_id, 'current_limit': current_limit}
+        row.update({key: float(value) for key, value in analysis.items()})
+        row['recommended_limit'] = rec_limit
+        row['explanation'] = explanation
+        rows.append(row)
+    return pd.DataFrame(rows)
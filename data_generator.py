@@ -2,12 +2,12 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
-def generate_synthetic_data(num_records=100):
+def generate_synthetic_data(num_records=100, seed=42):
     """
     Generates a synthetic transaction dataset for a credit card user.
     Columns: date, amount, category, payment_type, paid_on_time
     """
-    np.random.seed(42)
+    np.random.seed(seed)
     categories = ['Essential', 'Luxury', 'Bills', 'Entertainment', 'Dining']
     payment_types = ['Full Payment', 'Minimum Due', 'Partial Payment']
     
@@ -44,3 +44,15 @@ def generate_synthetic_data(num_records=100):
     df = pd.DataFrame(data)
     df['date'] = pd.to_datetime(df['date'])
     return df
+
+def generate_portfolio_data(num_customers=10, num_records=100):
+    """
+    Generates transactions for several customers, one seed per customer.
+    Columns: customer_id plus the generate_synthetic_data columns.
+    """
+    frames = []
+    for i in range(num_customers):
+        df = generate_synthetic_data(num_records, seed=42 + i)
+        df.insert(0, 'customer_id', f"CUST{i + 1:05d}")
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,164 @@
+import os
+import atexit
+import shutil
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+DEFAULT_BUDGET_MB = int(os.getenv("DCLA_DATA_STORE_MB", "512"))
+DEFAULT_DISK_BUDGET_MB = int(os.getenv("DCLA_DATA_STORE_DISK_MB", "2048"))
+
+def content_key(df):
+    """Content hash of a DataFrame (values, index, column names and dtypes)."""
+    h = hashlib.sha256()
+    h.update(repr(list(df.columns)).encode())
+    h.update(repr([str(t) for t in df.dtypes]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return h.hexdigest()
+
+class SharedDataStore:
+    """
+    Process-wide, content-addressed store for transaction frames.
+    Identical frames are kept once. get() hands out shallow copies; pandas
+    copy-on-write (switched on here for pandas < 3.0, where it is not the
+    default) keeps in-place edits in one session from reaching the others.
+    When the memory budget is exceeded the least recently used frames are
+    spilled to disk (or dropped if spilling is disabled or fails). When the
+    disk budget is exceeded the least recently spilled frames are dropped.
+    A spill directory created by the store is removed at exit.
+    """
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB, spill_dir=None, spill=True,
+                 disk_budget_mb=DEFAULT_DISK_BUDGET_MB):
+        if int(pd.__version__.split('.')[0]) < 3:
+            pd.set_option('mode.copy_on_write', True)
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.disk_budget_bytes = int(disk_budget_mb * 1024 * 1024)
+        self.spill = spill
+        self.spill_dir = spill_dir
+        self._frames = OrderedDict()  # key -> (df, nbytes), most recent last
+        self._spilled = OrderedDict() # key -> (path, file size), most recent last
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.spill_failures = 0
+
+    def put(self, df):
+        """Stores df (if not already present) and returns its content key."""
+        key = content_key(df)
+        with self._lock:
+            if key in self._frames:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return key
+            if key in self._spilled and self._load(key):
+                self.hits += 1
+                return key
+            self.misses += 1
+            frame = df.copy()
+            self._frames[key] = (frame, int(frame.memory_usage(deep=True).sum()))
+            self._evict(keep=key)
+        return key
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._frames or key in self._spilled
+
+    def get(self, key):
+        """Returns a shallow copy of the stored frame, or None if unknown."""
+        if key is None:
+            return None
+        with self._lock:
+            if key in self._frames:
+                self._frames.move_to_end(key)
+            elif key not in self._spilled or not self._load(key):
+                return None
+            return self._frames[key][0].copy(deep=False)
+
+    def discard(self, key):
+        """Removes a frame from memory and disk."""
+        with self._lock:
+            self._frames.pop(key, None)
+            self._remove_spilled(key)
+
+    def usage(self):
+        """Current memory usage of the store."""
+        with self._lock:
+            return {
+                'bytes_in_memory': self._memory_bytes(),
+                'budget_bytes': self.budget_bytes,
+                'frames_in_memory': len(self._frames),
+                'bytes_on_disk': self._disk_bytes(),
+                'disk_budget_bytes': self.disk_budget_bytes,
+                'frames_spilled': len(self._spilled),
+                'spill_failures': self.spill_failures,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _memory_bytes(self):
+        return sum(nbytes for _, nbytes in self._frames.values())
+
+    def _disk_bytes(self):
+        return sum(size for _, size in self._spilled.values())
+
+    def _evict(self, keep=None):
+        # Never evict the frame that was just requested
+        while self._memory_bytes() > self.budget_bytes and len(self._frames) > 1:
+            key = next(iter(self._frames))
+            if key == keep:
+                self._frames.move_to_end(key)
+                continue
+            if self.spill:
+                self._spill(key, self._frames[key][0])
+            del self._frames[key]
+
+    def _spill(self, key, frame):
+        """Writes frame to disk. On failure (e.g. disk full) it is just dropped."""
+        path = None
+        try:
+            if self.spill_dir is None:
+                self.spill_dir = tempfile.mkdtemp(prefix="dcla_store_")
+                atexit.register(shutil.rmtree, self.spill_dir, ignore_errors=True)
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, f"{key}.pkl")
+            frame.to_pickle(path)
+            self._spilled[key] = (path, os.path.getsize(path))
+        except OSError:
+            self.spill_failures += 1
+            if path and os.path.exists(path):
+                os.remove(path)
+            return
+        # Drop the oldest spilled frames once the disk budget is exceeded
+        while self._disk_bytes() > self.disk_budget_bytes:
+            self._remove_spilled(next(iter(self._spilled)))
+
+    def _remove_spilled(self, key):
+        path, _ = self._spilled.pop(key, (None, 0))
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    def _load(self, key):
+        """Moves a spilled frame back into memory. Returns False if its file is gone."""
+        path, _ = self._spilled[key]
+        try:
+            frame = pd.read_pickle(path)
+        except OSError:
+            self._spilled.pop(key)
+            return False
+        self._remove_spilled(key)
+        self._frames[key] = (frame, int(frame.memory_usage(deep=True).sum()))
+        self._evict(keep=key)
+        return True
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+def get_shared_store():
+    """Returns the process-wide SharedDataStore."""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = SharedDataStore()
+        return _shared_store
@@ -20,3 +20,17 @@ def generate_credit_decision(score, current_limit):
         explanation_text = "Exceptional creditworthiness detected. The user is eligible for a premium tier upgrade with a doubled credit limit."
         
     return score, round(recommended_limit, 2), explanation_text
+
+def get_decision_band(score):
+    """
+    Maps a final credit score to the decision band used by generate_credit_decision.
+    """
+    if score < 40:
+        return 'REDUCE'
+    elif score < 65:
+        return 'MAINTAIN'
+    elif score < 80:
+        return 'MODERATE_INCREASE'
+    elif score < 90:
+        return 'SIGNIFICANT_INCREASE'
+    return 'PREMIUM'
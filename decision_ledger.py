@@ -0,0 +1,189 @@
+import os
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from decision_engine import get_decision_band
+
+DEFAULT_LEDGER_PATH = os.getenv("DCLA_LEDGER_PATH", "decisions.db")
+
+SCORE_COLUMNS = [
+    'final_score', 'repayment_score', 'utilization_ratio',
+    'stability_score', 'growth_trend', 'lifestyle_score'
+]
+COLUMNS = ['customer_id', 'decided_at', 'decision_band'] + SCORE_COLUMNS + \
+          ['current_limit', 'recommended_limit', 'explanation', 'source']
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY,
+    customer_id TEXT NOT NULL,
+    decided_at TEXT NOT NULL,
+    decision_band TEXT NOT NULL,
+    {', '.join(f'{c} REAL' for c in SCORE_COLUMNS)},
+    current_limit REAL,
+    recommended_limit REAL,
+    explanation TEXT,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_decisions_customer ON decisions (customer_id, decided_at, id);
+CREATE INDEX IF NOT EXISTS idx_decisions_date ON decisions (decided_at, id);
+CREATE INDEX IF NOT EXISTS idx_decisions_band ON decisions (decision_band, decided_at, id);
+"""
+
+def _timestamp(value=None):
+    if value is None:
+        value = datetime.now()
+    if isinstance(value, str):
+        return value
+    return value.isoformat(sep=' ', timespec='seconds')
+
+class DecisionLedger:
+    """
+    Embedded SQLite store of credit decisions, indexed by customer, date and
+    decision band. One connection is shared across threads behind a lock.
+    """
+    def __init__(self, path=DEFAULT_LEDGER_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        if path != ':memory:':
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def record_decision(self, customer_id, analysis, decision, current_limit,
+                        decided_at=None, source='dashboard'):
+        """
+        Stores one dashboard decision.
+        analysis: dict from get_comprehensive_score
+        decision: (score, recommended_limit, explanation_text)
+        """
+        score, recommended_limit, explanation = decision
+        row = [customer_id, _timestamp(decided_at), get_decision_band(score)]
+        row += [float(analysis[c]) for c in SCORE_COLUMNS]
+        row += [float(current_limit), float(recommended_limit), explanation, source]
+        self._insert([row])
+
+    def record_batch(self, scores, decided_at=None, source='batch', chunk_size=50000):
+        """
+        Bulk-inserts batch scoring output (the frame from score_customers).
+        Each chunk is written in a single transaction. Returns rows written.
+        """
+        decided_at = _timestamp(decided_at)
+        frame = scores.assign(
+            decided_at=scores['decided_at'].map(_timestamp) if 'decided_at' in scores else decided_at,
+            decision_band=scores['final_score'].map(get_decision_band),
+            source=source
+        )[COLUMNS]
+        written = 0
+        for start in range(0, len(frame), chunk_size):
+            chunk = frame.iloc[start:start + chunk_size]
+            # Column-wise tolist() is much cheaper than itertuples and yields plain Python types
+            self._insert(zip(*(chunk[c].tolist() for c in COLUMNS)))
+            written += len(chunk)
+        return written
+
+    def _insert(self, rows):
+        sql = f"INSERT INTO decisions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        with self._lock, self.conn:
+            self.conn.executemany(sql, rows)
+
+    def _where(self, customer_id=None, band=None, start=None, end=None):
+        clauses, params = [], []
+        if customer_id is not None:
+            clauses.append("customer_id = ?")
+            params.append(customer_id)
+        if band is not None:
+            clauses.append("decision_band = ?")
+            params.append(band)
+        if start is not None:
+            clauses.append("decided_at >= ?")
+            params.append(_timestamp(start))
+        if end is not None:
+            clauses.append("decided_at < ?")
+            params.append(_timestamp(end))
+        return clauses, params
+
+    def query(self, customer_id=None, band=None, start=None, end=None, page_size=50, cursor=None):
+        """
+        Returns (rows, next_cursor), newest decisions first.
+        start is inclusive, end exclusive. Pass next_cursor back in to fetch
+        the following page; it is None on the last page. Uses keyset
+        pagination so deep pages stay as cheap as the first one.
+        """
+        clauses, params = self._where(customer_id, band, start, end)
+        if cursor is not None:
+            clauses.append("(decided_at, id) < (?, ?)")
+            params += list(cursor)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT * FROM decisions {where} ORDER BY decided_at DESC, id DESC LIMIT ?"
+        with self._lock:
+            rows = [dict(r) for r in self.conn.execute(sql, params + [page_size + 1])]
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = (rows[-1]['decided_at'], rows[-1]['id'])
+        return rows, next_cursor
+
+    def count(self, customer_id=None, band=None, start=None, end=None):
+        clauses, params = self._where(customer_id, band, start, end)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM decisions {where}", params).fetchone()[0]
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+def get_ledger():
+    """Returns the process-wide DecisionLedger."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = DecisionLedger()
+        return _ledger
+
+def benchmark_inserts(num_rows=1_000_000, path=':memory:', chunk_size=50000):
+    """
+    Times bulk inserts of synthetic decision rows and a few typical queries.
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(42)
+    scores = pd.DataFrame({
+        'customer_id': [f"CUST{i:07d}" for i in rng.integers(0, num_rows // 10 + 1, num_rows)],
+        'decided_at': pd.Timestamp('2026-01-01') + pd.to_timedelta(rng.integers(0, 300 * 86400, num_rows), unit='s'),
+        'current_limit': 50000.0,
+        'recommended_limit': 50000.0,
+        'explanation': ''
+    })
+    for column in SCORE_COLUMNS:
+        scores[column] = rng.uniform(0, 100, num_rows).round(2)
+    scores['decided_at'] = scores['decided_at'].dt.strftime('%Y-%m-%d %H:%M:%S')
+
+    ledger = DecisionLedger(path)
+    start = time.perf_counter()
+    ledger.record_batch(scores, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"inserted {num_rows:,} rows in {elapsed:.2f}s ({num_rows / elapsed:,.0f} rows/s)")
+
+    queries = {
+        'customer history': dict(customer_id=scores['customer_id'].iloc[0]),
+        'reductions in a month': dict(band='REDUCE', start='2026-06-01', end='2026-07-01'),
+        'latest page': dict(),
+    }
+    for name, kwargs in queries.items():
+        start = time.perf_counter()
+        rows, cursor = ledger.query(page_size=50, **kwargs)
+        if cursor is not None:
+            ledger.query(page_size=50, cursor=cursor, **kwargs)
+        print(f"{name}: 2 pages in {(time.perf_counter() - start) * 1000:.1f} ms")
+    ledger.close()
+
+if __name__ == '__main__':
+    benchmark_inserts()
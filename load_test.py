@@ -0,0 +1,308 @@
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import traceback
+import subprocess
+import urllib.request
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import streamlit as st
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# --- Server side: runs inside `streamlit run load_test.py -- --serve` ---
+
+@st.cache_resource
+def _stubbed_app_code(app_path):
+    """
+    Replaces Google OAuth and Gmail with no-ops and points the decision
+    ledger at a throwaway database, once per server process. Returns the
+    compiled app script.
+    """
+    import auth
+    import mailer
+    import decision_ledger
+
+    auth.handle_callback = lambda: None
+    auth.login_button = lambda: None
+    mailer.send_decision_email = lambda to_email, *args: (True, f"Stub email to {to_email}")
+    tmp_dir = tempfile.mkdtemp(prefix="dcla_load_")
+    decision_ledger._ledger = decision_ledger.DecisionLedger(os.path.join(tmp_dir, "decisions.db"))
+    with open(app_path) as f:
+        return compile(f.read(), app_path, 'exec')
+
+def serve_stubbed_app(app_path=APP_PATH):
+    """Runs the app for one rerun, logged in as analyst<n> from the ?session=<n> query parameter."""
+    code = _stubbed_app_code(app_path)
+    if 'logged_in' not in st.session_state:
+        st.session_state['logged_in'] = True
+        st.session_state['user_email'] = f"analyst{st.query_params.get('session', '0')}@bank.test"
+    exec(code, {'__name__': '__main__', '__file__': app_path})
+
+# --- Client side ---
+
+def _process_stats(pid):
+    """Returns (cpu seconds, RSS in MB) of a process."""
+    try:
+        import psutil
+        proc = psutil.Process(pid)
+        cpu = proc.cpu_times()
+        return cpu.user + cpu.system, proc.memory_info().rss / 1024 ** 2
+    except ImportError:
+        # Linux without psutil
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        ticks = os.sysconf('SC_CLK_TCK')
+        rss = int(fields[21]) * os.sysconf('SC_PAGE_SIZE')
+        return (int(fields[11]) + int(fields[12])) / ticks, rss / 1024 ** 2
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+@contextmanager
+def streamlit_server(app_path=APP_PATH, port=None, timeout=60):
+    """Starts `streamlit run load_test.py -- --serve` on localhost. Yields (url, pid)."""
+    port = port or _free_port()
+    cmd = [sys.executable, '-m', 'streamlit', 'run', os.path.abspath(__file__),
+           '--server.headless', 'true', '--server.address', 'localhost', '--server.port', str(port),
+           '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false',
+           '--', '--serve', '--app', os.path.abspath(app_path)]
+    # Server logs go to a file: an unread pipe would eventually block the server
+    log = tempfile.TemporaryFile()
+    # Started from the app's directory so its .streamlit/config.toml applies,
+    # as it does under `streamlit run app.py`
+    server = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT,
+                              cwd=os.path.dirname(os.path.abspath(app_path)))
+    url = f"http://localhost:{port}"
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if server.poll() is not None:
+                log.seek(0)
+                raise RuntimeError(f"streamlit exited:\n{log.read().decode()}")
+            try:
+                with urllib.request.urlopen(f"{url}/_stcore/health", timeout=1) as response:
+                    if response.status == 200:
+                        break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"streamlit did not start within {timeout}s")
+                time.sleep(0.2)
+        yield url, server.pid
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        log.close()
+
+class StreamlitSession:
+    """
+    Minimal browser stand-in for one analyst: talks to the server over the
+    Streamlit websocket, sends reruns with widget states the way the
+    frontend does and waits until the server reports the run finished.
+    Opening a tab is handled in the browser and never reaches the server.
+    """
+    def __init__(self, url, session_id, timeout=60):
+        self.url = url.replace('http', 'ws', 1) + "/_stcore/stream"
+        self.session_id = session_id
+        self.timeout = timeout
+        self.ws = None
+        self.page_script_hash = ""
+        self.widgets = {}   # label -> (widget id, element type, fragment id, proto)
+        self.values = {}    # widget id -> WidgetState the browser would resend
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+        return await self.rerun()
+
+    async def close(self):
+        await self.ws.close()
+
+    async def rerun(self, fragment_id=None, trigger=None):
+        """Sends one rerun request and returns the seconds until it finished."""
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.query_string = f"session={self.session_id}"
+        state.page_script_hash = self.page_script_hash
+        state.widget_states.widgets.extend(self.values.values())
+        if trigger is not None:
+            state.widget_states.widgets.add(id=trigger, trigger_value=True)
+        if fragment_id:
+            state.fragment_id = fragment_id
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        await asyncio.wait_for(self._wait_finished(), self.timeout)
+        return time.perf_counter() - start
+
+    async def _wait_finished(self):
+        errors = []
+        rendered = set()
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await self.ws.recv())
+            kind = msg.WhichOneof('type')
+            if kind == 'new_session':
+                self.page_script_hash = msg.new_session.page_script_hash
+                rendered = set()
+            elif kind == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+                element = msg.delta.new_element
+                element_type = element.WhichOneof('type')
+                if element_type == 'exception':
+                    errors.append(f"{element.exception.type}: {element.exception.message}")
+                elif element_type in ('button', 'number_input'):
+                    proto = getattr(element, element_type)
+                    self.widgets[proto.label] = (proto.id, element_type, msg.delta.fragment_id, proto)
+                    rendered.add(proto.id)
+            elif kind == 'script_finished':
+                if msg.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                if msg.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    errors.append("script failed to compile")
+                if errors:
+                    raise RuntimeError(f"session {self.session_id}: {'; '.join(errors)}")
+                if msg.script_finished == ForwardMsg.FINISHED_SUCCESSFULLY:
+                    # Like the browser, forget widgets a full run no longer draws
+                    # (e.g. an unkeyed widget whose id changed with its arguments)
+                    self.values = {i: v for i, v in self.values.items() if i in rendered}
+                    self.widgets = {l: w for l, w in self.widgets.items() if w[0] in rendered}
+                return
+
+    def _widget(self, prefix):
+        for label, widget in self.widgets.items():
+            if label.startswith(prefix):
+                return widget
+        raise RuntimeError(f"session {self.session_id}: no widget starting with {prefix!r}")
+
+    async def click(self, prefix):
+        widget_id, _, fragment_id, _ = self._widget(prefix)
+        return await self.rerun(fragment_id, trigger=widget_id)
+
+    async def set_number(self, prefix, value):
+        widget_id, _, fragment_id, proto = self._widget(prefix)
+        if proto.data_type == proto.INT:
+            self.values[widget_id] = WidgetState(id=widget_id, int_value=int(value))
+        else:
+            self.values[widget_id] = WidgetState(id=widget_id, double_value=float(value))
+        return await self.rerun(fragment_id)
+
+async def run_session(session, iterations, steps, pid=None):
+    """
+    Drives one connected analyst through the dashboard flow and appends
+    (step, seconds, server CPU seconds) for every interaction to steps.
+    Server CPU is only meaningful when this is the only active session.
+    """
+    async def timed(step, interaction):
+        cpu_start = _process_stats(pid)[0] if pid else np.nan
+        seconds = await interaction
+        cpu = _process_stats(pid)[0] - cpu_start if pid else np.nan
+        steps.append((step, seconds, cpu))
+
+    for i in range(iterations):
+        await timed('generate', session.click("Generate Synthetic Demo Data"))
+        limit = 50000 + 5000 * ((session.session_id + i) % 10 + 1)
+        await timed('change_limit', session.set_number("Enter Current Credit Card Limit", limit))
+        await timed('send_decision', session.click("🚀 Send Decision Email"))
+
+class LoadTestError(RuntimeError):
+    pass
+
+async def _run_sessions(url, pid, concurrency, iterations):
+    """
+    Connects `concurrency` sessions, then runs their flows together.
+    Returns (steps, seconds, server CPU seconds) for the timed part.
+    """
+    sessions = [StreamlitSession(url, i) for i in range(concurrency)]
+    steps = []
+    try:
+        # Initial page loads are a warm-up and not timed
+        await asyncio.gather(*(session.connect() for session in sessions))
+        cpu_start = _process_stats(pid)[0]
+        wall_start = time.perf_counter()
+        results = await asyncio.gather(
+            *(run_session(session, iterations, steps, pid if concurrency == 1 else None)
+              for session in sessions),
+            return_exceptions=True
+        )
+        wall = time.perf_counter() - wall_start
+        cpu = _process_stats(pid)[0] - cpu_start
+    finally:
+        await asyncio.gather(*(s.close() for s in sessions if s.ws is not None), return_exceptions=True)
+
+    errors = [(i, r) for i, r in enumerate(results) if isinstance(r, BaseException)]
+    if errors:
+        for session_id, error in errors:
+            tb = ''.join(traceback.format_exception(error))
+            print(f"--- session {session_id} failed (concurrency={concurrency}) ---\n{tb}", file=sys.stderr)
+        raise LoadTestError(f"{len(errors)} of {concurrency} sessions failed at concurrency {concurrency}; "
+                            f"level results discarded")
+    return steps, wall, cpu
+
+def run_level(url, pid, concurrency, iterations):
+    """
+    Runs `concurrency` simultaneous sessions against one server and
+    summarizes the interactions. CPU and RSS are the server process's.
+    Raises LoadTestError if any session fails, since numbers from an
+    incomplete set of interactions would be misleading.
+    """
+    steps, wall, cpu = asyncio.run(_run_sessions(url, pid, concurrency, iterations))
+    ms = np.array([s for _, s, _ in steps]) * 1000
+    return {
+        'concurrency': concurrency,
+        'interactions': len(ms),
+        'p50_ms': np.percentile(ms, 50),
+        'p95_ms': np.percentile(ms, 95),
+        'p99_ms': np.percentile(ms, 99),
+        'interactions_per_s': len(ms) / wall,
+        'server_cpu_s': cpu,
+        'server_cpu_pct': cpu / wall * 100,
+        'server_cpu_ms_per_interaction': cpu / len(ms) * 1000,
+        'server_rss_mb': _process_stats(pid)[1]
+    }
+
+def profile_steps(url, pid, iterations):
+    """
+    Runs a single session and returns mean latency and server CPU per
+    interaction type.
+    """
+    steps, _, _ = asyncio.run(_run_sessions(url, pid, 1, iterations))
+    frame = pd.DataFrame(steps, columns=['step', 'seconds', 'server_cpu_s'])
+    summary = frame.groupby('step', sort=False).agg(
+        interactions=('seconds', 'size'),
+        latency_ms=('seconds', 'mean'),
+        server_cpu_ms=('server_cpu_s', 'mean')
+    )
+    summary[['latency_ms', 'server_cpu_ms']] *= 1000
+    return summary
+
+def run_load_test(levels=(1, 2, 4, 8), iterations=3, app_path=APP_PATH):
+    """Runs each concurrency level in turn against one server. Returns one summary row per level."""
+    with streamlit_server(app_path) as (url, pid):
+        return pd.DataFrame([run_level(url, pid, concurrency, iterations) for concurrency in levels])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for app.py against a live server")
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--profile', action='store_true', help="per-interaction server CPU with one session")
+    parser.add_argument('--app', default=APP_PATH)
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve_stubbed_app(args.app)
+    elif args.profile:
+        with streamlit_server(args.app) as (url, pid):
+            print(profile_steps(url, pid, args.iterations).round(1).to_string())
+    else:
+        results = run_load_test(args.levels, args.iterations, args.app)
+        print(results.round(1).to_string(index=False))
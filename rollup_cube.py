@@ -0,0 +1,167 @@
+import time
+from itertools import combinations
+import pandas as pd
+from decision_engine import get_decision_band
+
+DIMENSIONS = ('score_band', 'decision_band', 'category', 'month')
+MEASURES = ['transactions', 'amount', 'on_time', 'customer_months']
+
+def score_band(score):
+    """10-point score band label, e.g. 72.4 -> '70-80'."""
+    lower = min(90, max(0, int(score // 10) * 10))
+    return f"{lower}-{lower + 10}"
+
+def label_transactions(transactions, scores):
+    """
+    Tags each transaction with its month and its customer's score band and
+    decision band from a batch scoring run (the frame from score_customers).
+    """
+    bands = pd.DataFrame({
+        'customer_id': scores['customer_id'],
+        'score_band': scores['final_score'].map(score_band),
+        'decision_band': scores['final_score'].map(get_decision_band)
+    })
+    tx = transactions.merge(bands, on='customer_id', how='inner')
+    tx['month'] = tx['date'].dt.to_period('M').astype(str)
+    return tx
+
+def _cuboid_names():
+    return [dims for r in range(len(DIMENSIONS) + 1) for dims in combinations(DIMENSIONS, r)]
+
+def _delta_cube(tx):
+    """
+    Aggregates labelled transactions into every cuboid.
+    customer_months counts distinct customers per month, summed over
+    months, which keeps it additive when months are added or replaced.
+    """
+    cuboids = {}
+    for dims in _cuboid_names():
+        keys = list(dims) if 'month' in dims else list(dims) + ['month']
+        cells = tx.groupby(keys, observed=True).agg(
+            transactions=('amount', 'size'),
+            amount=('amount', 'sum'),
+            on_time=('paid_on_time', 'sum'),
+            customer_months=('customer_id', 'nunique')
+        )
+        if 'month' not in dims:
+            cells = cells.groupby(level=list(dims)).sum() if dims else cells.sum().to_frame().T
+        cuboids[dims] = cells.astype(float)
+    return cuboids
+
+class RollupCube:
+    """
+    Precomputed aggregates of score band x decision band x category x month.
+    Every one of the 16 cuboids (group-by combinations) is materialized, so
+    slice and drill-down queries only read precomputed cells.
+
+    Score and decision bands are as of the scoring run that was loaded with
+    each month. Adding a month only touches that month's cells, and
+    reloading a month subtracts its old contribution first.
+    """
+    def __init__(self):
+        self.cuboids = {dims: pd.DataFrame(columns=MEASURES, dtype=float) for dims in _cuboid_names()}
+        self.months = set()
+
+    @classmethod
+    def build(cls, transactions, scores):
+        cube = cls()
+        cube.update(transactions, scores)
+        return cube
+
+    def update(self, transactions, scores):
+        """
+        Loads transactions (with customer_id) and the scores that apply to
+        them. Months already in the cube are replaced, not double counted.
+        """
+        tx = label_transactions(transactions, scores)
+        new_months = set(tx['month'].unique())
+        replaced = sorted(new_months & self.months)
+        if replaced:
+            self._subtract_months(replaced)
+        for dims, cells in _delta_cube(tx).items():
+            self.cuboids[dims] = self._add(self.cuboids[dims], cells)
+        self.months |= new_months
+
+    def _add(self, current, delta):
+        if current.empty:
+            return delta
+        combined = current.add(delta, fill_value=0)
+        return combined[combined['transactions'] > 0]
+
+    def _subtract_months(self, months):
+        for dims in self.cuboids:
+            with_month = tuple(d for d in DIMENSIONS if d in dims or d == 'month')
+            old = self.cuboids[with_month]
+            old = old[old.index.get_level_values('month').isin(months)]
+            if 'month' not in dims:
+                old = old.groupby(level=list(dims)).sum() if dims else old.sum().to_frame().T
+            self.cuboids[dims] = self._add(self.cuboids[dims], -old)
+        self.months -= set(months)
+
+    def query(self, by=(), **filters):
+        """
+        Returns measures grouped by the dimensions in `by`, restricted to
+        filters (a value or list of values per dimension), e.g.
+        cube.query(by=['month'], decision_band='REDUCE', category='Luxury').
+        Filtering a non-month dimension to several values sums their cells,
+        so customer_months can double count customers in that case.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        unknown = set(by) | set(filters)
+        unknown -= set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown dimensions: {sorted(unknown)}")
+
+        dims = tuple(d for d in DIMENSIONS if d in by or d in filters)
+        cells = self.cuboids[dims]
+        if cells.empty:
+            return pd.DataFrame(columns=MEASURES + ['avg_amount', 'on_time_rate'])
+        for dim, value in filters.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            cells = cells[cells.index.get_level_values(dim).isin(values)]
+
+        if by:
+            result = cells.groupby(level=by).sum() if tuple(by) != dims else cells
+        else:
+            result = cells.sum().to_frame().T
+        result = result.copy()
+        result['avg_amount'] = result['amount'] / result['transactions']
+        result['on_time_rate'] = result['on_time'] / result['transactions'] * 100
+        return result
+
+    def drill_down(self, by, dimension, **filters):
+        """Same slice as query(by, **filters), split one dimension further."""
+        by = [by] if isinstance(by, str) else list(by)
+        return self.query(by=by + [dimension], **filters)
+
+if __name__ == '__main__':
+    from data_generator import generate_portfolio_data
+    from batch_scoring import score_customers
+
+    portfolio = generate_portfolio_data(num_customers=500, num_records=200)
+    scores = score_customers(portfolio)
+    months = portfolio['date'].dt.to_period('M').astype(str)
+    last_month = months.max()
+
+    start = time.perf_counter()
+    cube = RollupCube.build(portfolio[months != last_month], scores)
+    print(f"built {len(cube.months)} months in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    cube.update(portfolio[months == last_month], scores)
+    print(f"added {last_month} in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    full = RollupCube.build(portfolio, scores)
+    for dims, cells in full.cuboids.items():
+        pd.testing.assert_frame_equal(cells.sort_index(), cube.cuboids[dims].sort_index(), check_like=True)
+    print("incremental cube matches a full rebuild")
+
+    queries = {
+        'band x decision': dict(by=['score_band', 'decision_band']),
+        'reductions by month': dict(by=['month'], decision_band='REDUCE'),
+        'luxury drill-down': dict(by=['decision_band', 'month'], category='Luxury'),
+    }
+    for name, kwargs in queries.items():
+        start = time.perf_counter()
+        cube.query(**kwargs)
+        print(f"{name}: {(time.perf_counter() - start) * 1000:.2f} ms")
@@ -0,0 +1,300 @@
+import os
+import time
+import zlib
+import argparse
+import threading
+import traceback
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import Listener, Client
+import pandas as pd
+from batch_scoring import score_customers, get_customer_limit, DEFAULT_LIMIT
+
+def authkey_from_env():
+    """
+    Reads the shared secret for coordinator/worker connections.
+    multiprocessing.connection unpickles every message, so there is no
+    fallback key: anyone holding the key can run code on the other side.
+    """
+    key = os.getenv("DCLA_SHARD_AUTHKEY")
+    if not key:
+        raise SystemExit("DCLA_SHARD_AUTHKEY must be set to a shared secret for coordinator/worker mode.")
+    return key.encode()
+
+def partition_customers(df, num_shards):
+    """
+    Splits a portfolio frame into shards by a stable hash of customer_id.
+    Returns a list of (shard_id, frame), largest shard first.
+    """
+    keys = df['customer_id'].astype(str).map(lambda c: zlib.crc32(c.encode()) % num_shards)
+    shards = [(shard_id, group) for shard_id, group in df.groupby(keys, sort=True)]
+    return sorted(shards, key=lambda s: (-len(s[1]), s[0]))
+
+class ShardFailedError(RuntimeError):
+    pass
+
+class ShardCoordinator:
+    """
+    Hands shards to workers over multiprocessing.connection sockets.
+    Workers pull a new shard whenever they are idle, so large shards don't
+    hold up the rest. Once the queue is empty, idle workers steal a copy of
+    the oldest shard still running elsewhere; the first result wins.
+    Shards whose worker errors or disconnects are retried up to max_retries.
+
+    Protocol (pickled tuples):
+        worker -> ('ready',) | ('result', shard_id, frame) | ('error', shard_id, traceback)
+        coordinator -> ('shard', shard_id, frame, current_limits) | ('stop',)
+    """
+    def __init__(self, shards, authkey, current_limits=None, default_limit=DEFAULT_LIMIT,
+                 address=('localhost', 0), max_retries=2, steal=True):
+        self.shards = dict(shards)
+        self.current_limits = current_limits
+        self.default_limit = default_limit
+        self.max_retries = max_retries
+        self.steal = steal
+        self.listener = Listener(address, authkey=authkey)
+        self.pending = deque(shard_id for shard_id, _ in shards)
+        self.running = {}   # shard_id -> list of (worker_id, start_time)
+        self.attempts = {shard_id: 0 for shard_id in self.shards}
+        self.results = {}
+        self.error = None
+        self.stats = {'dispatched': 0, 'stolen': 0, 'retried': 0, 'workers': 0}
+        self._cond = threading.Condition()
+        self._threads = []
+
+    @property
+    def address(self):
+        return self.listener.address
+
+    def _finished(self):
+        return self.error is not None or len(self.results) == len(self.shards)
+
+    def _shard_limits(self, shard):
+        # Resolve limits here: the worker's score_customers only knows DEFAULT_LIMIT
+        if self.current_limits is None:
+            return self.default_limit
+        if not isinstance(self.current_limits, dict):
+            return self.current_limits
+        return {cid: get_customer_limit(self.current_limits, cid, self.default_limit)
+                for cid in shard['customer_id'].unique()}
+
+    def _next_shard(self, worker_id):
+        """Picks the next shard for worker_id; call with the lock held."""
+        if self.pending:
+            return self.pending.popleft(), False
+        if not self.steal:
+            return None, False
+        candidates = [
+            (min(start for _, start in runs), shard_id)
+            for shard_id, runs in self.running.items()
+            if shard_id not in self.results and all(w != worker_id for w, _ in runs)
+        ]
+        if candidates:
+            return min(candidates)[1], True
+        return None, False
+
+    def _release(self, shard_id, worker_id):
+        runs = [r for r in self.running.get(shard_id, []) if r[0] != worker_id]
+        if runs:
+            self.running[shard_id] = runs
+        else:
+            self.running.pop(shard_id, None)
+
+    def _fail(self, shard_id, worker_id, reason):
+        """Records a failed attempt and requeues the shard; call with the lock held."""
+        self._release(shard_id, worker_id)
+        if shard_id in self.results or shard_id in self.running or shard_id in self.pending:
+            return
+        self.attempts[shard_id] += 1
+        if self.attempts[shard_id] > self.max_retries:
+            self.error = ShardFailedError(f"Shard {shard_id} failed {self.attempts[shard_id]} times:\n{reason}")
+        else:
+            self.stats['retried'] += 1
+            self.pending.appendleft(shard_id)
+
+    def _serve(self, conn, worker_id):
+        current = None
+        try:
+            while True:
+                msg = conn.recv()
+                with self._cond:
+                    if msg[0] == 'result':
+                        _, shard_id, frame = msg
+                        self.results.setdefault(shard_id, frame)
+                        self._release(shard_id, worker_id)
+                    elif msg[0] == 'error':
+                        self._fail(msg[1], worker_id, msg[2])
+                    current = None
+
+                    shard_id = None
+                    while not self._finished():
+                        shard_id, stolen = self._next_shard(worker_id)
+                        if shard_id is not None:
+                            break
+                        self._cond.wait(timeout=0.1)
+                    self._cond.notify_all()
+                    if shard_id is None:
+                        conn.send(('stop',))
+                        return
+                    self.running.setdefault(shard_id, []).append((worker_id, time.monotonic()))
+                    self.stats['dispatched'] += 1
+                    self.stats['stolen'] += stolen
+                    current = shard_id
+                shard = self.shards[shard_id]
+                conn.send(('shard', shard_id, shard, self._shard_limits(shard)))
+        except (EOFError, OSError):
+            # Worker went away; put its shard back
+            if current is not None:
+                with self._cond:
+                    self._fail(current, worker_id, f"worker {worker_id} disconnected")
+                    self._cond.notify_all()
+        finally:
+            conn.close()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except multiprocessing.AuthenticationError:
+                # Wrong or missing authkey; keep serving real workers
+                continue
+            except (OSError, EOFError):
+                return
+            with self._cond:
+                self.stats['workers'] += 1
+                worker_id = self.stats['workers']
+            thread = threading.Thread(target=self._serve, args=(conn, worker_id), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def run(self, timeout=None):
+        """
+        Waits until every shard has a result and returns the merged frame,
+        sorted by customer_id so the output doesn't depend on scheduling.
+        """
+        accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        accept_thread.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._finished():
+                if deadline is not None and time.monotonic() > deadline:
+                    self.error = TimeoutError(f"{len(self.results)}/{len(self.shards)} shards done before timeout")
+                    break
+                self._cond.wait(timeout=0.1)
+            self._cond.notify_all()
+        self.listener.close()
+        for thread in list(self._threads):
+            thread.join(timeout=1)
+        if self.error is not None:
+            raise self.error
+        frames = [self.results[shard_id] for shard_id in sorted(self.results)]
+        frames = [frame for frame in frames if len(frame)]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True).sort_values('customer_id', ignore_index=True)
+
+def run_worker(address, authkey, crash_after=None):
+    """
+    Connects to a coordinator and scores shards until told to stop.
+    crash_after makes the worker exit abruptly after that many shards,
+    which is only useful for exercising the retry path.
+    """
+    conn = Client(tuple(address), authkey=authkey)
+    conn.send(('ready',))
+    done = 0
+    try:
+        while True:
+            msg = conn.recv()
+            if msg[0] == 'stop':
+                return
+            _, shard_id, shard, current_limits = msg
+            if crash_after is not None and done >= crash_after:
+                os._exit(1)
+            try:
+                conn.send(('result', shard_id, score_customers(shard, current_limits)))
+            except Exception:
+                conn.send(('error', shard_id, traceback.format_exc()))
+            done += 1
+    except (EOFError, OSError):
+        return
+    finally:
+        conn.close()
+
+def run_local(df, num_workers=4, num_shards=None, current_limits=None, crash_after=None, **kwargs):
+    """
+    Runs the coordinator in this process and num_workers worker processes
+    on localhost, using a random authkey for this run only.
+    Returns (scores frame, coordinator stats).
+    """
+    num_shards = num_shards or num_workers * 4
+    authkey = os.urandom(32)
+    coordinator = ShardCoordinator(partition_customers(df, num_shards), authkey, current_limits, **kwargs)
+    ctx = multiprocessing.get_context('spawn')
+    workers = [
+        ctx.Process(target=run_worker, args=(coordinator.address, authkey),
+                    kwargs={'crash_after': crash_after if i == 0 else None})
+        for i in range(num_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        result = coordinator.run()
+    finally:
+        for worker in workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+    return result, coordinator.stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded portfolio scoring")
+    sub = parser.add_subparsers(dest='mode', required=True)
+
+    coord = sub.add_parser('coordinator', help="serve shards of a portfolio CSV to workers")
+    coord.add_argument('input_csv')
+    coord.add_argument('output_csv')
+    coord.add_argument('--host', default='localhost')
+    coord.add_argument('--port', type=int, default=6100)
+    coord.add_argument('--shards', type=int, default=64)
+    coord.add_argument('--limit', type=float, default=DEFAULT_LIMIT)
+
+    work = sub.add_parser('worker', help="score shards for a coordinator")
+    work.add_argument('--host', default='localhost')
+    work.add_argument('--port', type=int, default=6100)
+
+    local = sub.add_parser('local', help="end-to-end run on generated data with local workers")
+    local.add_argument('--workers', type=int, default=4)
+    local.add_argument('--customers', type=int, default=200)
+    local.add_argument('--records', type=int, default=150)
+    local.add_argument('--crash-after', type=int, default=None)
+
+    args = parser.parse_args()
+    if args.mode == 'coordinator':
+        authkey = authkey_from_env()
+        df = pd.read_csv(args.input_csv)
+        df['date'] = pd.to_datetime(df['date'])
+        coordinator = ShardCoordinator(partition_customers(df, args.shards), authkey, args.limit,
+                                       address=(args.host, args.port))
+        print(f"Coordinator listening on {coordinator.address}")
+        coordinator.run().to_csv(args.output_csv, index=False)
+        print(coordinator.stats)
+    elif args.mode == 'worker':
+        run_worker((args.host, args.port), authkey_from_env())
+    else:
+        from data_generator import generate_portfolio_data
+        df = generate_portfolio_data(args.customers, args.records)
+
+        start = time.perf_counter()
+        serial = score_customers(df)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sharded, stats = run_local(df, args.workers, crash_after=args.crash_after)
+        sharded_time = time.perf_counter() - start
+
+        pd.testing.assert_frame_equal(serial, sharded)
+        print(f"serial: {serial_time:.2f}s  sharded ({args.workers} workers): {sharded_time:.2f}s")
+        print(f"results match serial scoring; {stats}")
+
+if __name__ == '__main__':
+    main()
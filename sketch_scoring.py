@@ -0,0 +1,357 @@
+import math
+import pandas as pd
+import numpy as np
+from analysis import PAYMENT_TYPE_WEIGHTS, combine_scores, get_comprehensive_score
+
+WINDOW_DAYS = 30
+
+def _as_bool(value):
+    """Parses paid_on_time values coming from CSV/JSON feeds."""
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', '1', 'yes')
+    return bool(value)
+
+class Moments:
+    """
+    Welford running mean/variance. Mergeable with Chan's parallel formula.
+    """
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, other):
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+
+    def copy(self):
+        m = Moments()
+        m.n, m.mean, m.m2 = self.n, self.mean, self.m2
+        return m
+
+    def std(self):
+        # Sample std (ddof=1), same as pandas Series.std()
+        if self.n < 2:
+            return 0.0
+        return math.sqrt(self.m2 / (self.n - 1))
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch with bounded relative error (DDSketch style).
+    Buckets are plain counts, so two sketches merge by adding them.
+    """
+    def __init__(self, relative_accuracy=0.01, max_bins=512):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, x):
+        self.count += 1
+        if x <= 0:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(x) / self.log_gamma)
+        self.bins[key] = self.bins.get(key, 0) + 1
+        self._collapse()
+
+    def merge(self, other):
+        self.count += other.count
+        self.zero_count += other.zero_count
+        for key, c in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + c
+        self._collapse()
+
+    def _collapse(self):
+        # Fold the lowest buckets together so memory stays fixed
+        while len(self.bins) > self.max_bins:
+            lowest, second = sorted(self.bins)[:2]
+            self.bins[second] += self.bins.pop(lowest)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return float('nan')
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if rank < seen:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+class CustomerSummary:
+    """
+    Fixed-size streaming summary of one customer's transactions.
+    - counts/sums for repayment and lifestyle scores
+    - per-day buckets covering the last 30 days for utilization
+    - a few open months; older months are folded into Welford moments
+      and regression sums for stability and growth
+    - a quantile sketch of transaction amounts
+    Months that arrive after they were folded are counted in late_amount
+    and only affect the totals, which is the main source of error.
+    """
+    def __init__(self, max_open_months=12):
+        self.max_open_months = max_open_months
+        self.count = 0
+        self.on_time = 0
+        self.type_weight_sum = 0.0
+        self.type_weight_count = 0
+        self.total = 0.0
+        self.essential = 0.0
+        self.luxury = 0.0
+        self.max_day = None
+        self.daily = {}
+        self.open_months = {}
+        self.last_closed_month = None
+        self.closed_moments = Moments()
+        self.closed_sx = 0.0
+        self.closed_sxx = 0.0
+        self.closed_sxy = 0.0
+        self.late_amount = 0.0
+        self.late_count = 0
+        self.amounts = QuantileSketch()
+
+    def update(self, date, amount, category, payment_type, paid_on_time):
+        date = pd.Timestamp(date)
+        amount = float(amount)
+
+        self.count += 1
+        self.on_time += _as_bool(paid_on_time)
+        weight = PAYMENT_TYPE_WEIGHTS.get(payment_type)
+        if weight is not None:
+            self.type_weight_sum += weight
+            self.type_weight_count += 1
+        self.total += amount
+        if category in ('Essential', 'Bills'):
+            self.essential += amount
+        elif category == 'Luxury':
+            self.luxury += amount
+        self.amounts.add(amount)
+
+        self._add_day(date.toordinal(), amount)
+        self._add_month(date.year * 12 + date.month - 1, amount)
+
+    def _add_day(self, day, amount):
+        if self.max_day is None or day > self.max_day:
+            self.max_day = day
+        if day > self.max_day - WINDOW_DAYS:
+            self.daily[day] = self.daily.get(day, 0.0) + amount
+        self._prune_days()
+
+    def _prune_days(self):
+        cutoff = self.max_day - WINDOW_DAYS
+        for day in [d for d in self.daily if d <= cutoff]:
+            del self.daily[day]
+
+    def _add_month(self, month, amount):
+        if month in self.open_months:
+            self.open_months[month] += amount
+        elif self.last_closed_month is None or month > self.last_closed_month:
+            self.open_months[month] = amount
+            self._close_months()
+        else:
+            self.late_amount += amount
+            self.late_count += 1
+
+    def _close_months(self):
+        while len(self.open_months) > self.max_open_months:
+            month = min(self.open_months)
+            self._fold_month(month, self.open_months.pop(month))
+            # After a merge the open months can be older than the marker;
+            # it must never move back or a folded month could reopen
+            self.last_closed_month = month if self.last_closed_month is None else max(self.last_closed_month, month)
+
+    def _fold_month(self, month, total):
+        self.closed_moments.add(total)
+        self.closed_sx += month
+        self.closed_sxx += month * month
+        self.closed_sxy += month * total
+
+    def merge(self, other):
+        """
+        Merges another summary of the same customer into this one.
+        Shards must not fold the same month twice, so split them by
+        customer or on month boundaries.
+        """
+        self.count += other.count
+        self.on_time += other.on_time
+        self.type_weight_sum += other.type_weight_sum
+        self.type_weight_count += other.type_weight_count
+        self.total += other.total
+        self.essential += other.essential
+        self.luxury += other.luxury
+        self.late_amount += other.late_amount
+        self.late_count += other.late_count
+        self.amounts.merge(other.amounts)
+
+        if other.max_day is not None:
+            if self.max_day is None or other.max_day > self.max_day:
+                self.max_day = other.max_day
+            for day, value in other.daily.items():
+                self.daily[day] = self.daily.get(day, 0.0) + value
+            self._prune_days()
+
+        self.closed_moments.merge(other.closed_moments)
+        self.closed_sx += other.closed_sx
+        self.closed_sxx += other.closed_sxx
+        self.closed_sxy += other.closed_sxy
+        if other.last_closed_month is not None:
+            if self.last_closed_month is None or other.last_closed_month > self.last_closed_month:
+                self.last_closed_month = other.last_closed_month
+        for month, value in other.open_months.items():
+            self.open_months[month] = self.open_months.get(month, 0.0) + value
+        self._close_months()
+
+    def _month_stats(self):
+        """Returns (moments, sx, sxx, sxy) over closed and open months."""
+        moments = self.closed_moments.copy()
+        sx, sxx, sxy = self.closed_sx, self.closed_sxx, self.closed_sxy
+        for month, total in self.open_months.items():
+            moments.add(total)
+            sx += month
+            sxx += month * month
+            sxy += month * total
+        return moments, sx, sxx, sxy
+
+    def score(self, current_limit):
+        """Returns the same dict as analysis.get_comprehensive_score."""
+        on_time_ratio = self.on_time / self.count * 100 if self.count else float('nan')
+        if self.type_weight_count:
+            avg_payment_weight = self.type_weight_sum / self.type_weight_count * 100
+        else:
+            avg_payment_weight = float('nan')
+        repayment = min(100, max(0, (on_time_ratio * 0.6) + (avg_payment_weight * 0.4)))
+
+        utilization = sum(self.daily.values()) / current_limit * 100
+
+        moments, sx, sxx, sxy = self._month_stats()
+        if moments.n < 2:
+            stability = 100.0
+            growth = 0.0
+        else:
+            variance = moments.std() / moments.mean
+            stability = min(100, max(0, 100 - (variance * 100)))
+            n = moments.n
+            sy = moments.mean * n
+            denom = n * sxx - sx * sx
+            growth = (n * sxy - sx * sy) / denom if denom else 0.0
+
+        if self.total == 0:
+            lifestyle = 100
+        else:
+            essential_ratio = self.essential / self.total
+            luxury_ratio = self.luxury / self.total
+            lifestyle = min(100, max(0, ((essential_ratio * 100) + ((1 - luxury_ratio) * 100)) / 2))
+
+        return combine_scores(repayment, utilization, stability, growth, lifestyle)
+
+def iter_records(df):
+    """Yields transaction dicts from a DataFrame, in row order."""
+    for record in df.to_dict('records'):
+        yield record
+
+def summarize_stream(records, summaries=None, max_open_months=12, default_customer='default'):
+    """
+    Consumes an iterable of transaction dicts into per-customer summaries.
+    Records without customer_id are assigned to default_customer.
+    """
+    if summaries is None:
+        summaries = {}
+    for record in records:
+        customer_id = record.get('customer_id', default_customer)
+        summary = summaries.get(customer_id)
+        if summary is None:
+            summary = summaries[customer_id] = CustomerSummary(max_open_months)
+        summary.update(
+            record['date'],
+            record['amount'],
+            record['category'],
+            record['payment_type'],
+            record['paid_on_time']
+        )
+    return summaries
+
+def merge_summaries(*shards):
+    """Merges per-customer summary dicts from several shards into a new dict."""
+    merged = {}
+    for shard in shards:
+        for customer_id, summary in shard.items():
+            if customer_id not in merged:
+                merged[customer_id] = CustomerSummary(summary.max_open_months)
+            merged[customer_id].merge(summary)
+    return merged
+
+def score_summaries(summaries, current_limit):
+    """Scores every customer summary. Returns {customer_id: score dict}."""
+    return {cid: summary.score(current_limit) for cid, summary in summaries.items()}
+
+def _month_shards(df, num_shards):
+    # Contiguous month ranges, so no month is folded in two shards
+    months = df['date'].dt.to_period('M')
+    chunks = np.array_split(np.sort(months.unique()), num_shards)
+    return [df[months.isin(chunk)] for chunk in chunks if len(chunk)]
+
+def benchmark_sketch_error(df, current_limit, num_shards=4, max_open_months=12, shuffle=False, late_frac=0.0):
+    """
+    Compares sketch scoring with exact get_comprehensive_score per customer.
+    The frame is split into month shards that are summarized separately
+    and merged. shuffle=True feeds each shard out of date order.
+    late_frac holds back that share of rows and streams them into the
+    merged summaries afterwards, as late arrivals.
+    Returns a DataFrame of absolute errors per customer and metric;
+    extra_months counts months folded more than once (should be 0).
+    """
+    if 'customer_id' not in df.columns:
+        df = df.assign(customer_id='default')
+    late = df.sample(frac=late_frac, random_state=0) if late_frac else df.iloc[:0]
+
+    shards = []
+    for i, shard in enumerate(_month_shards(df.drop(index=late.index), num_shards)):
+        if shuffle:
+            shard = shard.sample(frac=1, random_state=i)
+        shards.append(summarize_stream(iter_records(shard), max_open_months=max_open_months))
+    summaries = merge_summaries(*shards)
+    summarize_stream(iter_records(late), summaries, max_open_months=max_open_months)
+    approx = score_summaries(summaries, current_limit)
+
+    rows = []
+    for customer_id, group in df.groupby('customer_id'):
+        exact = get_comprehensive_score(group.copy(), current_limit)
+        summary = summaries[customer_id]
+        row = {'customer_id': customer_id}
+        for key, value in exact.items():
+            row[key] = abs(approx[customer_id][key] - value)
+        for q in (0.5, 0.9, 0.99):
+            true_q = np.quantile(group['amount'], q, method='lower')
+            row[f'amount_p{int(q * 100)}_rel_error'] = abs(summary.amounts.quantile(q) - true_q) / true_q
+        row['late_count'] = summary.late_count
+        months = group['date'].dt.to_period('M').nunique()
+        row['extra_months'] = summary.closed_moments.n + len(summary.open_months) - months
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+if __name__ == '__main__':
+    from data_generator import generate_portfolio_data
+
+    portfolio = generate_portfolio_data(num_customers=50, num_records=400)
+    for max_open_months, shuffle, late_frac in ((12, False, 0.0), (12, True, 0.0), (2, True, 0.0), (2, False, 0.05)):
+        errors = benchmark_sketch_error(portfolio, 50000, num_shards=2, max_open_months=max_open_months,
+                                        shuffle=shuffle, late_frac=late_frac)
+        print(f"max_open_months={max_open_months} shuffle={shuffle} late_frac={late_frac}")
+        print(errors.drop(columns=['customer_id']).agg(['mean', 'max']).T.round(4))
@@ -0,0 +1,370 @@
+import os
+import json
+import math
+import time
+import asyncio
+import argparse
+import tempfile
+from collections import deque, defaultdict
+import numpy as np
+import pandas as pd
+from analysis import get_comprehensive_score
+from decision_engine import generate_credit_decision, get_decision_band
+from batch_scoring import get_customer_limit, DEFAULT_LIMIT
+from sketch_scoring import CustomerSummary, _as_bool
+
+REQUIRED_FIELDS = ('date', 'amount', 'category', 'payment_type', 'paid_on_time')
+
+def parse_record(record):
+    """
+    Validates one feed record (a dict or a JSON line) and normalises it:
+    customer_id becomes a str ('default' if absent), date a Timestamp,
+    amount and sent_at floats, paid_on_time a bool. Raises ValueError or
+    TypeError if the record can't be scored.
+    """
+    if isinstance(record, (str, bytes)):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError(f"expected a JSON object, got {type(record).__name__}")
+    missing = [f for f in REQUIRED_FIELDS if record.get(f) is None]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    record = dict(record)
+    customer_id = record.get('customer_id', 'default')
+    if isinstance(customer_id, bool) or not isinstance(customer_id, (str, int)):
+        raise ValueError(f"invalid customer_id: {customer_id!r}")
+    record['customer_id'] = str(customer_id)
+    record['date'] = pd.Timestamp(record['date'])
+    if pd.isna(record['date']):
+        raise ValueError("invalid date")
+    record['amount'] = float(record['amount'])
+    if not math.isfinite(record['amount']):
+        raise ValueError("invalid amount")
+    record['paid_on_time'] = _as_bool(record['paid_on_time'])
+    if 'sent_at' in record:
+        record['sent_at'] = float(record['sent_at'])
+    return record
+
+async def tail_jsonl(path, poll_interval=0.05, idle_timeout=None):
+    """
+    Yields lines appended to path, like `tail -f`.
+    Stops after idle_timeout seconds without new lines (None = never).
+    """
+    buffer = ""
+    idle_since = time.monotonic()
+    with open(path, 'r') as f:
+        while True:
+            chunk = f.readline()
+            if chunk:
+                buffer += chunk
+                if buffer.endswith("\n"):
+                    line, buffer = buffer.strip(), ""
+                    if line:
+                        yield line
+                    idle_since = time.monotonic()
+                continue
+            if idle_timeout is not None and time.monotonic() - idle_since > idle_timeout:
+                return
+            await asyncio.sleep(poll_interval)
+
+async def read_socket(host, port):
+    """Yields lines from a newline-delimited socket feed until it closes."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        async for line in reader:
+            line = line.strip()
+            if line:
+                yield line
+    finally:
+        writer.close()
+
+class JsonlSink:
+    """Appends band events to a JSONL file."""
+    def __init__(self, path):
+        self.f = open(path, 'a')
+
+    async def __call__(self, event):
+        self.f.write(json.dumps(event) + "\n")
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+class StreamStats:
+    def __init__(self, max_samples=100000):
+        self.first_event = None
+        self.last_scored = None
+        self.events = 0
+        self.batches = 0
+        self.rescored = 0
+        self.band_changes = 0
+        self.customers = 0
+        self.bad_records = 0
+        self.last_error = None
+        self.max_queue_depth = 0
+        self.latencies = deque(maxlen=max_samples)
+
+    def summary(self):
+        # Sustained rate: first event read to last batch scored
+        elapsed = (self.last_scored - self.first_event) if self.events else 0.0
+        latencies = np.array(self.latencies) * 1000
+        return {
+            'events': self.events,
+            'batches': self.batches,
+            'customers_rescored': self.rescored,
+            'customers': self.customers,
+            'band_changes': self.band_changes,
+            'bad_records': self.bad_records,
+            'last_error': self.last_error,
+            'events_per_s': self.events / elapsed if elapsed else 0.0,
+            'latency_p50_ms': np.percentile(latencies, 50) if len(latencies) else np.nan,
+            'latency_p95_ms': np.percentile(latencies, 95) if len(latencies) else np.nan,
+            'latency_p99_ms': np.percentile(latencies, 99) if len(latencies) else np.nan,
+            'max_queue_depth': self.max_queue_depth
+        }
+
+class StreamScorer:
+    """
+    Consumes transaction events, micro-batches them per customer and
+    rescores the customers each batch touched.
+
+    Events go through a bounded asyncio.Queue. Only one batch is scored at
+    a time, so when scoring falls behind the queue fills up and the reader
+    waits on put(): that is the backpressure.
+
+    scorer='exact' keeps each customer's last history_months calendar
+    months of transactions (None = all) and calls get_comprehensive_score;
+    scorer='sketch' keeps a fixed-size CustomerSummary instead (see
+    sketch_scoring).
+
+    Records that fail parse_record are skipped and counted in bad_records.
+    The first score for a customer is emitted as an 'initial_band' event,
+    later band moves as 'band_change'.
+    """
+    def __init__(self, emit, current_limits=None, default_limit=DEFAULT_LIMIT, scorer='exact',
+                 window=0.2, max_batch=5000, max_queue=20000, history_months=12):
+        if scorer not in ('exact', 'sketch'):
+            raise ValueError(f"Unknown scorer: {scorer}")
+        self.emit = emit
+        self.current_limits = current_limits
+        self.default_limit = default_limit
+        self.scorer = scorer
+        self.window = window
+        self.max_batch = max_batch
+        self.history_months = history_months
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.history = defaultdict(list)
+        self.summaries = {}
+        self.bands = {}
+        self.stats = StreamStats()
+
+    async def ingest(self, source):
+        """Feeds records from an async iterator into the queue, then signals the end."""
+        async for raw in source:
+            if self.stats.first_event is None:
+                self.stats.first_event = time.monotonic()
+            try:
+                record = parse_record(raw)
+            except (ValueError, TypeError) as e:
+                self.stats.bad_records += 1
+                self.stats.last_error = f"{type(e).__name__}: {e}"
+                continue
+            # sent_at (set by the producer) gives true end-to-end latency
+            await self.queue.put((record, record.get('sent_at', time.time())))
+            depth = self.queue.qsize()
+            self.stats.max_queue_depth = max(self.stats.max_queue_depth, depth)
+            if depth % 500 == 0:
+                # put() doesn't yield while the queue has room; let the batcher run
+                await asyncio.sleep(0)
+        await self.queue.put(None)
+
+    async def _next_batch(self):
+        """Collects events for up to `window` seconds. Returns (batch, finished)."""
+        first = await self.queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _score_customer(self, customer_id, records):
+        current_limit = get_customer_limit(self.current_limits, customer_id, self.default_limit)
+        if self.scorer == 'sketch':
+            summary = self.summaries.get(customer_id)
+            if summary is None:
+                summary = self.summaries[customer_id] = CustomerSummary()
+            for r in records:
+                summary.update(r['date'], r['amount'], r['category'], r['payment_type'], r['paid_on_time'])
+            analysis = summary.score(current_limit)
+        else:
+            history = self.history[customer_id]
+            history.extend(records)
+            if self.history_months is not None:
+                latest = max(r['date'] for r in history).to_period('M')
+                cutoff = (latest - (self.history_months - 1)).start_time
+                history[:] = [r for r in history if r['date'] >= cutoff]
+            df = pd.DataFrame(history)
+            analysis = get_comprehensive_score(df, current_limit)
+        score, rec_limit, explanation = generate_credit_decision(analysis['final_score'], current_limit)
+        return float(score), rec_limit, current_limit
+
+    def _score_batch(self, by_customer):
+        return {cid: self._score_customer(cid, records) for cid, records in by_customer.items()}
+
+    async def run(self):
+        """Scores batches until the ingest side signals the end of the feed."""
+        loop = asyncio.get_running_loop()
+        finished = False
+        while not finished:
+            batch, finished = await self._next_batch()
+            if not batch:
+                continue
+            by_customer = defaultdict(list)
+            for record, _ in batch:
+                by_customer[record['customer_id']].append(record)
+
+            # Score off the event loop so ingestion keeps reading meanwhile
+            results = await loop.run_in_executor(None, self._score_batch, by_customer)
+
+            done = time.time()
+            self.stats.last_scored = time.monotonic()
+            for _, sent_at in batch:
+                self.stats.latencies.append(done - sent_at)
+            self.stats.events += len(batch)
+            self.stats.batches += 1
+            self.stats.rescored += len(results)
+
+            for customer_id in sorted(results):
+                score, rec_limit, current_limit = results[customer_id]
+                band = get_decision_band(score)
+                old_band = self.bands.get(customer_id)
+                self.bands[customer_id] = band
+                if old_band is None:
+                    self.stats.customers += 1
+                    event = 'initial_band'
+                elif band != old_band:
+                    self.stats.band_changes += 1
+                    event = 'band_change'
+                else:
+                    continue
+                await self.emit({
+                    'event': event,
+                    'customer_id': customer_id,
+                    'old_band': old_band,
+                    'new_band': band,
+                    'final_score': score,
+                    'current_limit': current_limit,
+                    'recommended_limit': rec_limit,
+                    'scored_at': done
+                })
+        return self.stats.summary()
+
+async def consume(source, emit, **kwargs):
+    """
+    Runs ingestion and scoring for one feed. Returns the stats summary.
+    If either side fails, the other is cancelled and the error re-raised.
+    """
+    scorer = StreamScorer(emit, **kwargs)
+    ingest = asyncio.create_task(scorer.ingest(source))
+    scoring = asyncio.create_task(scorer.run())
+    try:
+        done, _ = await asyncio.wait({ingest, scoring}, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+        return scoring.result()
+    finally:
+        for task in (ingest, scoring):
+            task.cancel()
+        await asyncio.gather(ingest, scoring, return_exceptions=True)
+
+async def replay_to_jsonl(df, path, rate=None):
+    """
+    Appends the frame's rows to path as JSONL in date order, stamping
+    sent_at. rate limits events/second (None = as fast as possible).
+    """
+    records = df.sort_values('date').assign(date=df['date'].dt.strftime('%Y-%m-%d')).to_dict('records')
+    start = time.monotonic()
+    with open(path, 'a') as f:
+        for i, record in enumerate(records):
+            record['sent_at'] = time.time()
+            f.write(json.dumps(record, default=str) + "\n")
+            if i % 100 == 99:
+                f.flush()
+                if rate:
+                    delay = start + (i + 1) / rate - time.monotonic()
+                    await asyncio.sleep(max(0, delay))
+                else:
+                    await asyncio.sleep(0)
+        f.flush()
+
+async def replay_benchmark(num_customers=50, num_records=200, rate=None, scorer='exact', out_path=None):
+    """
+    Replays generated portfolio data through a JSONL file while the stream
+    consumer tails it. Returns the stats summary.
+    """
+    from data_generator import generate_portfolio_data
+
+    df = generate_portfolio_data(num_customers, num_records)
+    tmp_dir = tempfile.mkdtemp(prefix="dcla_stream_")
+    feed = os.path.join(tmp_dir, "feed.jsonl")
+    open(feed, 'w').close()
+    sink = JsonlSink(out_path or os.path.join(tmp_dir, "band_changes.jsonl"))
+    try:
+        producer = asyncio.create_task(replay_to_jsonl(df, feed, rate))
+        summary = await consume(tail_jsonl(feed, idle_timeout=1.0), sink, scorer=scorer)
+        await producer
+    finally:
+        sink.close()
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming rescoring from a JSONL or socket feed")
+    sub = parser.add_subparsers(dest='mode', required=True)
+
+    # Long-running feeds default to the fixed-size sketch scorer
+    tail = sub.add_parser('tail', help="tail a JSONL feed and write band events")
+    tail.add_argument('feed')
+    tail.add_argument('output')
+    tail.add_argument('--scorer', choices=['exact', 'sketch'], default='sketch')
+    tail.add_argument('--history-months', type=int, default=12)
+
+    sock = sub.add_parser('socket', help="read a newline-delimited JSON socket feed")
+    sock.add_argument('host')
+    sock.add_argument('port', type=int)
+    sock.add_argument('output')
+    sock.add_argument('--scorer', choices=['exact', 'sketch'], default='sketch')
+    sock.add_argument('--history-months', type=int, default=12)
+
+    replay = sub.add_parser('replay', help="benchmark against a local replay of generated data")
+    replay.add_argument('--customers', type=int, default=50)
+    replay.add_argument('--records', type=int, default=200)
+    replay.add_argument('--rate', type=float, default=None)
+    replay.add_argument('--scorer', choices=['exact', 'sketch'], default='exact')
+
+    args = parser.parse_args()
+    if args.mode == 'replay':
+        summary = asyncio.run(replay_benchmark(args.customers, args.records, args.rate, args.scorer))
+        for key, value in summary.items():
+            print(f"{key}: {value:,.1f}" if isinstance(value, float) else f"{key}: {value}")
+        return
+
+    sink = JsonlSink(args.output)
+    source = tail_jsonl(args.feed) if args.mode == 'tail' else read_socket(args.host, args.port)
+    try:
+        print(asyncio.run(consume(source, sink, scorer=args.scorer, history_months=args.history_months)))
+    finally:
+        sink.close()
+
+if __name__ == '__main__':
+    main()
@@ -56,3 +56,13 @@ def get_table_download_link(df, filename="data.csv"):
     csv = df.to_csv(index=False)
     b64 = base64.b64encode(csv.encode()).decode()
     return f'<a href="data:file/csv;base64,{b64}" download="{filename}">Download CSV File</a>'
+
+def derived(state, name, deps, compute):
+    """
+    Returns a cached value from state (a dict, e.g. in st.session_state),
+    calling compute() only when deps differ from the last call under name.
+    """
+    entry = state.get(name)
+    if entry is None or entry[0] != deps:
+        entry = state[name] = (deps, compute())
+    return entry[1]